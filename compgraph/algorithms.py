@@ -6,9 +6,7 @@ from . import Graph, operations
 def word_count_graph(input_stream_name: str, text_column: str = 'text', count_column: str = 'count') -> Graph:
     """Constructs graph which counts words in text_column of all rows passed"""
     return Graph.graph_from_iter(input_stream_name) \
-        .map(operations.FilterPunctuation(text_column)) \
-        .map(operations.LowerCase(text_column)) \
-        .map(operations.Split(text_column)) \
+        .map(operations.TextNormalize(text_column)) \
         .sort([text_column]) \
         .reduce(operations.Count(count_column), [text_column]) \
         .sort([count_column, text_column])
@@ -17,16 +15,16 @@ def word_count_graph(input_stream_name: str, text_column: str = 'text', count_co
 def inverted_index_graph(input_stream_name: str, doc_column: str = 'doc_id', text_column: str = 'text',
                          result_column: str = 'tf_idf') -> Graph:
     """Constructs graph which calculates td-idf for every word/document pair"""
+    # Reading input once for both words splitting and documents counting
+    docs: Graph = Graph.graph_from_iter(input_stream_name).cache()
+
     # Splitting words
-    split_words: Graph = Graph.graph_from_iter(input_stream_name) \
-        .map(operations.FilterPunctuation(text_column)) \
-        .map(operations.LowerCase(text_column)) \
-        .map(operations.Split(text_column))
-
-    # Calculating number of documents
-    doc_count: Graph = Graph.graph_from_iter(input_stream_name) \
-        .sort((doc_column,)) \
-        .reduce(operations.FirstReducer(), (doc_column,)) \
+    split_words: Graph = docs.map(operations.TextNormalize(text_column))
+
+    # Calculating number of documents (distinct ids are collected by hash, no sorting needed)
+    doc_count: Graph = docs \
+        .map(operations.Project((doc_column,))) \
+        .reduce(operations.FirstReducer(), (doc_column,), strategy='hash') \
         .reduce(operations.Count('num_docs'), tuple())
 
     # Calculating idf index by number of words per one doc and doc number
@@ -61,13 +59,11 @@ def pmi_graph(input_stream_name: str, doc_column: str = 'doc_id', text_column: s
     """Constructs graph which gives for every document the top 10 words ranked by pointwise mutual information"""
     # Splitting words and filtering the shortest
     split_words: Graph = Graph.graph_from_iter(input_stream_name) \
-        .map(operations.FilterPunctuation(text_column)) \
-        .map(operations.LowerCase(text_column)) \
-        .map(operations.Split(text_column)) \
+        .map(operations.TextNormalize(text_column)) \
         .map(operations.Filter(lambda row: len(row[text_column]) > 4))
 
-    # Making indexation for further correct ordering
-    indexed_words: Graph = split_words.reduce(operations.Index('index'), tuple())
+    # Making indexation for further correct ordering, result is reused by three subgraphs
+    indexed_words: Graph = split_words.reduce(operations.Index('index'), tuple()).cache()
 
     # Filtering words by occurrences in docs
     filtered_count: Graph = indexed_words.sort([text_column, doc_column]) \
@@ -135,17 +131,11 @@ def yandex_maps_graph(input_stream_name_time: str, input_stream_name_length: str
         .map(operations.Project((edge_id_column, 'length'))) \
         .sort((edge_id_column,))
 
-    # Calculating duration
+    # Calculating duration, hour and weekday of enter time in one pass
     duration: Graph = Graph.graph_from_iter(input_stream_name_time) \
-        .map(operations.StringToDateTime([enter_time_column, leave_time_column])) \
-        .map(operations.Apply(
-            (enter_time_column, leave_time_column),
-            'duration',
-            lambda t1, t2: (t2 - t1).total_seconds() / 3600)
-        ) \
-        .map(operations.Apply((enter_time_column,), hour_result_column, lambda t: t.hour)) \
-        .map(operations.Apply((enter_time_column,), weekday_result_column, lambda t: t.strftime('%a'))) \
-        .map(operations.Remove((enter_time_column, leave_time_column))) \
+        .map(operations.DurationHourWeekday(
+            enter_time_column, leave_time_column, 'duration', hour_result_column, weekday_result_column
+        )) \
         .sort((edge_id_column,))
 
     # Merging results by edge_id, calculating speed, selecting columns
@@ -1,9 +1,31 @@
 import typing as tp
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from . import operations as ops
 from . external_sort import ExternalSort
 
 
+class RunContext:
+    """State shared by all graph nodes during one run"""
+
+    def __init__(self, parallel: bool = False) -> None:
+        """
+        :param parallel: materialize right tables of joins in separate threads
+        """
+        self.parallel = parallel
+        self.cached: dict[int, ops.SpillList] = {}
+        self.locks: dict[int, threading.Lock] = {}
+
+
+def _drain(rows: ops.TRowsIterable) -> list[ops.TRow]:
+    return list(rows)
+
+
+def _future_rows(future: 'Future[list[ops.TRow]]') -> ops.TRowsGenerator:
+    yield from future.result()
+
+
 class Graph:
     """Computational graph implementation"""
     def __init__(self) -> None:
@@ -35,20 +57,55 @@ class Graph:
 
     def map(self, mapper: ops.Mapper) -> 'Graph':
         """Construct new graph extended with map operation with particular mapper
+        Sequential maps are fused into one ops.FusedMap operation
         :param mapper: mapper to use
         """
         graph: 'Graph' = Graph()
-        graph._op = ops.Map(mapper)
-        graph._prev = self
+        if isinstance(self._op, ops.Map) or isinstance(self._op, ops.FusedMap):
+            mappers = [self._op.mapper] if isinstance(self._op, ops.Map) else list(self._op.mappers)
+            composed = self._compose_columns_mappers(mappers[-1], mapper)
+            if composed is not None:
+                mappers[-1] = composed
+            else:
+                mappers.append(mapper)
+            graph._op = ops.Map(mappers[0]) if len(mappers) == 1 else ops.FusedMap(mappers)
+            graph._prev = self._prev
+        else:
+            graph._op = ops.Map(mapper)
+            graph._prev = self
         return graph
 
-    def reduce(self, reducer: ops.Reducer, keys: tp.Sequence[str]) -> 'Graph':
+    @staticmethod
+    def _compose_columns_mappers(first: ops.Mapper, second: ops.Mapper) -> tp.Optional[ops.Mapper]:
+        """Merge two sequential Project/Remove mappers into one, None if they can not be merged
+        Project raises KeyError for missing column, so merging is skipped whenever the merged mapper
+        would stop checking column requested by any of the two
+        :param first: mapper applied first
+        :param second: mapper applied second
+        """
+        if type(first) is ops.Project and type(second) is ops.Project:
+            if set(second.columns) == set(first.columns):
+                return ops.Project(second.columns)
+        elif type(first) is ops.Remove and type(second) is ops.Remove:
+            return ops.Remove(tuple(first.columns) + tuple(k for k in second.columns if k not in first.columns))
+        elif type(first) is ops.Project and type(second) is ops.Remove:
+            if not set(second.columns) & set(first.columns):
+                return first
+        elif type(first) is ops.Remove and type(second) is ops.Project:
+            if not set(second.columns) & set(first.columns):
+                return ops.Project(second.columns)
+        return None
+
+    def reduce(self, reducer: ops.Reducer, keys: tp.Sequence[str], strategy: str = 'sort') -> 'Graph':
         """Construct new graph extended with reduce operation with particular reducer
         :param reducer: reducer to use
         :param keys: keys for grouping
+        :param strategy: 'sort' to stream groups of table sorted by keys,
+            'hash' to collect groups of unsorted table in memory (fits small number of rows)
         """
+        assert strategy in ('sort', 'hash'), 'Unknown reduce strategy'
         graph: 'Graph' = Graph()
-        graph._op = ops.Reduce(reducer, keys)
+        graph._op = ops.Reduce(reducer, keys) if strategy == 'sort' else ops.HashReduce(reducer, keys)
         graph._prev = self
         return graph
 
@@ -61,6 +118,17 @@ class Graph:
         graph._prev = self
         return graph
 
+    def cache(self, max_rows_in_memory: int = 100000) -> 'Graph':
+        """Construct new graph extended with cache operation: rows are computed once per run
+        and replayed to every graph consuming the result
+        Use ops.Cache
+        :param max_rows_in_memory: number of rows kept in memory, the rest is spilled to temporary file
+        """
+        graph: 'Graph' = Graph()
+        graph._op = ops.Cache(max_rows_in_memory)
+        graph._prev = self
+        return graph
+
     def join(self, joiner: ops.Joiner, join_graph: 'Graph', keys: tp.Sequence[str]) -> 'Graph':
         """Construct new graph extended with join operation with another graph
         :param joiner: join strategy to use
@@ -75,15 +143,43 @@ class Graph:
 
     def run(self, **kwargs: tp.Any) -> ops.TRowsIterable:
         """Single method to start execution; data sources passed as kwargs"""
+        yield from self._run(RunContext(), **kwargs)
+
+    def run_parallel(self, **kwargs: tp.Any) -> ops.TRowsIterable:
+        """Start execution, where the right table of every join is computed in a separate thread
+        concurrently with the left one and materialized in memory; data sources passed as kwargs
+        Sorts started in these threads fork sorting processes, which is acceptable since child process
+        only runs do_sort over its pipe and never touches locks held by other threads of the parent
+        """
+        yield from self._run(RunContext(parallel=True), **kwargs)
+
+    def _run(self, context: RunContext, **kwargs: tp.Any) -> ops.TRowsIterable:
+        """
+        :param context: state of current run
+        """
         if isinstance(self._op, ops.ReadIterFactory) or isinstance(self._op, ops.Read):
             assert self._prev is None and self._next is None, 'Static init should not have pre info'
             yield from self._op(**kwargs)
         elif isinstance(self._op, ops.Join):
             assert self._next is not None and self._prev is not None, 'Both vals to join are not nulls'
-            yield from self._op(self._prev.run(**kwargs), self._next.run(**kwargs))
+            if not context.parallel:
+                yield from self._op(self._prev._run(context, **kwargs), self._next._run(context, **kwargs))
+                return
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                right = executor.submit(_drain, self._next._run(context, **kwargs))
+                yield from self._op(self._prev._run(context, **kwargs), _future_rows(right))
+        elif isinstance(self._op, ops.Cache):
+            assert self._next is None and self._prev is not None, 'For cache need only first param'
+            # Lock prevents several threads from computing the same cache
+            with context.locks.setdefault(id(self), threading.Lock()):
+                if id(self) not in context.cached:
+                    context.cached[id(self)] = self._op.materialize(self._prev._run(context, **kwargs))
+            yield from self._op(context.cached[id(self)])
         else:
             assert isinstance(self._op, ops.Map) or \
+                   isinstance(self._op, ops.FusedMap) or \
                    isinstance(self._op, ops.Reduce) or \
+                   isinstance(self._op, ops.HashReduce) or \
                    isinstance(self._op, ExternalSort), 'Unknown operation'
             assert self._next is None and self._prev is not None, 'For map/reduce/sort need only first param'
-            yield from self._op(self._prev.run(**kwargs))
+            yield from self._op(self._prev._run(context, **kwargs))
@@ -4,12 +4,20 @@ from .base import (  # noqa: F401
     TRowsGenerator,
     Operation,
     Map,
+    FusedMap,
     Mapper,
+    SingleOutMapper,
+    BatchMapper,
     Reduce,
+    HashReduce,
     Reducer,
     Join,
     Joiner
 )
+from .batch import (  # noqa: F401
+    RowBatch,
+    iter_batches
+)
 from .map import (  # noqa: F401
     DummyMapper,
     FilterPunctuation,
@@ -19,7 +27,9 @@ from .map import (  # noqa: F401
     Project,
     Product,
     Split,
+    TextNormalize,
     StringToDateTime,
+    DurationHourWeekday,
     HaversineDist,
     Remove
 )
@@ -43,3 +53,7 @@ from .read import (  # noqa: F401
     Read,
     ReadIterFactory
 )
+from .cache import (  # noqa: F401
+    Cache,
+    SpillList
+)
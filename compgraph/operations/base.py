@@ -1,20 +1,31 @@
+import os
 import typing as tp
-from itertools import groupby
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain, groupby
 from operator import itemgetter
 from abc import abstractmethod, ABC
 
+from .batch import RowBatch, iter_batches
+
 
 TRow = dict[str, tp.Any]
 TRowsIterable = tp.Iterable[TRow]
 TRowsGenerator = tp.Generator[TRow, None, None]
+# (source, result) column names taken from left and right rows while joining
+TColumnsPlan = tuple[list[tuple[str, str]], list[tuple[str, str]]]
 
 
 __all__ = [
     'Operation',
     'Mapper',
+    'SingleOutMapper',
+    'BatchMapper',
     'Map',
+    'FusedMap',
     'Reducer',
     'Reduce',
+    'HashReduce',
     'Joiner',
     'Join',
     'TRowsGenerator',
@@ -26,13 +37,27 @@ __all__ = [
 def safe_itemgetter(keys: tp.Sequence[str]) -> tp.Any:
     """
     Return getter, safe for empty sequence
+    Getter returns scalar for single key, tuple for several keys and empty tuple for no keys
     :param keys: tuple of keys
     """
     if not keys:
-        return lambda _: []
+        return lambda _: ()
     return itemgetter(*keys)
 
 
+def key_row_maker(keys: tp.Sequence[str]) -> tp.Callable[[tp.Any], TRow]:
+    """
+    Return function which makes row of key columns from value returned by safe_itemgetter(keys)
+    :param keys: tuple of keys
+    """
+    if not keys:
+        return lambda _: {}
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda value: {key: value}
+    return lambda values: dict(zip(keys, values))
+
+
 class Operation(ABC):
     """Base class for all operations"""
 
@@ -52,6 +77,29 @@ class Mapper(ABC):
         pass
 
 
+class SingleOutMapper(Mapper):
+    """Base class for mappers which yield exactly one row for every input one"""
+
+    @abstractmethod
+    def transform(self, row: TRow) -> TRow:
+        """
+        In-place version of mapper, used by FusedMap
+        :param row: one table row, owned by caller and allowed to be modified
+        """
+        pass
+
+
+class BatchMapper(SingleOutMapper):
+    """Base class for single output mappers which also process column oriented batches"""
+
+    @abstractmethod
+    def call_batch(self, batch: RowBatch) -> RowBatch:
+        """
+        :param batch: chunk of rows, owned by caller and allowed to be modified
+        """
+        pass
+
+
 class Map(Operation):
     def __init__(self, mapper: Mapper) -> None:
         """
@@ -60,12 +108,54 @@ class Map(Operation):
         self.mapper = mapper
 
     def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
+        # Single mapper stays on row path, transposing to columns and back pays off only in FusedMap chains
         for row in rows:
             yield from self.mapper(row)
 
 
+class FusedMap(Operation):
+    def __init__(self, mappers: tp.Sequence[Mapper]) -> None:
+        """
+        Chain of mappers applied in one pass, row is copied once for all single output mappers in a row
+        :param mappers: mappers to apply sequentially
+        """
+        self.mappers = list(mappers)
+
+    def _apply(self, row: TRow, start: int, owned: bool) -> TRowsGenerator:
+        for i in range(start, len(self.mappers)):
+            mapper = self.mappers[i]
+            if isinstance(mapper, SingleOutMapper):
+                if not owned:
+                    row = row.copy()
+                    owned = True
+                row = mapper.transform(row)
+            else:
+                # Mapper may yield one dict several times or reuse it after yielding,
+                # so rows it yields are never modified in place
+                for result_row in mapper(row):
+                    yield from self._apply(result_row, i + 1, False)
+                return
+        yield row
+
+    def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
+        if all(isinstance(mapper, BatchMapper) for mapper in self.mappers):
+            for batch in iter_batches(rows):
+                for mapper in self.mappers:
+                    batch = tp.cast(BatchMapper, mapper).call_batch(batch)
+                yield from batch.to_rows()
+            return
+        for row in rows:
+            yield from self._apply(row, 0, False)
+
+
 class Reducer(ABC):
-    """Base class for reducers"""
+    """
+    Base class for reducers
+    Passed rows may be shared with other consumers (e.g. renewable sources or graph branches),
+    so reducers yield new dicts instead of modifying them
+    """
+
+    __slots__ = ()
 
     @abstractmethod
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
@@ -74,6 +164,16 @@ class Reducer(ABC):
         """
         pass
 
+    def reduce_groups(self, group_key: tuple[str, ...],
+                      groups: tp.Iterable[tuple[tp.Any, TRowsIterable]]) -> TRowsGenerator:
+        """
+        Reduce all groups of table in one call, reducers override it to avoid generator per group
+        :param group_key: keys of grouping
+        :param groups: pairs of key values (as returned by safe_itemgetter) and non-empty group rows
+        """
+        for _, rows in groups:
+            yield from self(group_key, rows)
+
 
 class Reduce(Operation):
     def __init__(self, reducer: Reducer, keys: tp.Sequence[str]) -> None:
@@ -83,14 +183,45 @@ class Reduce(Operation):
         """
         self.reducer = reducer
         self.keys = keys
+        self._keys_tuple = tuple(keys)
+        self._getter = safe_itemgetter(keys)
 
     def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
         """
         :param keys: keys to group by
         :param rows: table rows
         """
-        for key, group_items in groupby(rows, key=safe_itemgetter(self.keys)):
-            yield from self.reducer(tuple(self.keys), group_items)
+        yield from self.reducer.reduce_groups(self._keys_tuple, groupby(rows, key=self._getter))
+
+
+class HashReduce(Operation):
+    def __init__(self, reducer: Reducer, keys: tp.Sequence[str]) -> None:
+        """
+        Reduce which does not require sorted input, groups are collected in memory
+        and passed to reducer in order of first appearance
+        :param reducer: reducer to apply to equal keys sets
+        :param keys: set of keys to group by
+        """
+        self.reducer = reducer
+        self.keys = keys
+        self._keys_tuple = tuple(keys)
+
+    def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
+        """
+        :param rows: table rows
+        """
+        if not self.keys:
+            # The only group is the whole table, so it can be streamed
+            rows = iter(rows)
+            for first in rows:
+                yield from self.reducer(self._keys_tuple, chain((first,), rows))
+                break
+            return
+        groups: defaultdict[tp.Any, list[TRow]] = defaultdict(list)
+        getter = itemgetter(*self.keys)
+        for row in rows:
+            groups[getter(row)].append(row)
+        yield from self.reducer.reduce_groups(self._keys_tuple, groups.items())
 
 
 class Joiner(ABC):
@@ -104,91 +235,172 @@ class Joiner(ABC):
         """
         self._a_suffix = suffix_a
         self._b_suffix = suffix_b
+        self._schema_cache: dict[tuple[tuple[str, ...], frozenset[str], frozenset[str]], TColumnsPlan] = {}
 
     @abstractmethod
-    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
+    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: tp.Sequence[TRow]) -> TRowsGenerator:
         """
         :param keys: join keys
         :param rows_a: left table rows
-        :param rows_b: right table rows
+        :param rows_b: right table rows, materialized by Join
         """
         pass
 
-    def prod_tables(self, keys: tp.Sequence[str], rows_a: tp.Iterable[TRow], rows_b: tp.List[TRow]) -> TRowsGenerator:
+    def prod_tables(self, keys: tp.Sequence[str], rows_a: tp.Iterable[TRow],
+                    rows_b: tp.Sequence[TRow]) -> TRowsGenerator:
         """
         Calculate cartesian products of tables with equal keys
         :param keys: keys to group by
         :param rows_a: generator of rows from first table
-        :param rows_b: list of rows from second table
+        :param rows_b: list or tuple of rows from second table
         """
         if not rows_b:
             return
+        b_keys = rows_b[0].keys()
+        if any(b.keys() != b_keys for b in rows_b):
+            # Schemas differ inside group, resolve columns for every pair
+            for a in rows_a:
+                for b in rows_b:
+                    a_cols, b_cols = self._resolve_columns(keys, a.keys(), b.keys())
+                    row: TRow = {dst: a[src] for src, dst in a_cols}
+                    row.update({dst: b[src] for src, dst in b_cols})
+                    yield row
+            return
+
+        a_keys: tp.Any = None
+        b_parts: list[TRow] = []
         for a in rows_a:
-            for b in rows_b:
-                row: dict[str, tp.Any] = {k: a[k] for k in keys}
-                inter: set[str] = set(a.keys()) & set(b.keys())
-                common: set[str] = inter - set(keys)
-                for k in common:
-                    row[k + self._a_suffix] = a[k]
-                    row[k + self._b_suffix] = b[k]
-                for k in set(a.keys()) - inter:
-                    row[k] = a[k]
-                for k in set(b.keys()) - inter:
-                    row[k] = b[k]
-                yield row
+            if a.keys() != a_keys:
+                a_keys = a.keys()
+                a_cols, b_cols = self._resolve_columns(keys, a_keys, b_keys)
+                b_parts = [{dst: b[src] for src, dst in b_cols} for b in rows_b]
+            a_part: TRow = {dst: a[src] for src, dst in a_cols}
+            for b_part in b_parts:
+                yield {**a_part, **b_part}
+
+    def _resolve_columns(self, keys: tp.Sequence[str], a_keys: tp.Collection[str],
+                         b_keys: tp.Collection[str]) -> TColumnsPlan:
+        """
+        Calculate (source, result) column names of joined row, equal non-key columns get suffixes
+        Plans are cached by schemas of both rows
+        :param keys: join keys
+        :param a_keys: columns of row from first table
+        :param b_keys: columns of row from second table
+        """
+        schema = (tuple(keys), frozenset(a_keys), frozenset(b_keys))
+        plan = self._schema_cache.get(schema)
+        if plan is None:
+            plan = self._schema_cache[schema] = self._plan_columns(keys, a_keys, b_keys)
+        return plan
+
+    def _plan_columns(self, keys: tp.Sequence[str], a_keys: tp.Collection[str],
+                      b_keys: tp.Collection[str]) -> TColumnsPlan:
+        a_cols: list[tuple[str, str]] = [(k, k) for k in keys]
+        a_cols += [(k, k + self._a_suffix if k in b_keys else k) for k in a_keys if k not in keys]
+        b_cols: list[tuple[str, str]] = [(k, k + self._b_suffix if k in a_keys else k) for k in b_keys if k not in keys]
+        return a_cols, b_cols
+
+
+class BufferedGroups:
+    """Iterator over (key, group) pairs, which materializes next group in background thread"""
+
+    def __init__(self, groups: tp.Iterator[tuple[tp.Any, TRowsIterable]], executor: ThreadPoolExecutor) -> None:
+        """
+        :param groups: groupby iterator, used only by background thread
+        :param executor: executor to load groups with
+        """
+        self._groups = groups
+        self._executor = executor
+        self._future: Future[tuple[tp.Any, list[TRow]] | None] = executor.submit(self._load)
+
+    def _load(self) -> tuple[tp.Any, list[TRow]] | None:
+        for key, group in self._groups:
+            return key, list(group)
+        return None
+
+    def __iter__(self) -> 'BufferedGroups':
+        return self
+
+    def __next__(self) -> tuple[tp.Any, list[TRow]]:
+        loaded = self._future.result()
+        if loaded is None:
+            raise StopIteration
+        self._future = self._executor.submit(self._load)
+        return loaded
 
 
 class Join(Operation):
     def __init__(self, joiner: Joiner, keys: tp.Sequence[str]):
         """
+        Set environment variable JOIN_PREFETCH=1 to materialize right table groups in background thread,
+        which helps when reading right table waits for I/O
+        Both tables may then read the same Cache from different threads, which is safe since Cache
+        is materialized under lock and spilled chunks of SpillList are read under lock
         :pram joiner: joiner for merging tables
         :param keys: set of keys to group by
         """
         self.joiner = joiner
         self.keys = keys
-
-    def _comparator(self, row: TRow) -> list[tp.Any]:
-        return [row[key] for key in self.keys]
+        self.prefetch = os.environ.get('JOIN_PREFETCH') == '1'
+        self._comparator = safe_itemgetter(keys)
 
     @staticmethod
-    def _next_iter(iterator: tp.Any) -> tuple[list[tp.Any] | None, TRowsIterable | None]:
+    def _next_iter(iterator: tp.Any) -> tuple[tp.Any, TRowsIterable | None]:
         try:
             return next(iterator)
         except StopIteration:
             return None, None
 
+    @staticmethod
+    def _materialize(group: TRowsIterable) -> tp.Sequence[TRow]:
+        """Right table group is materialized once here, so joiners do not copy it"""
+        return group if isinstance(group, (list, tuple)) else tuple(group)
+
     def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
         """
         :param rows: left table to join
         :param args[0]: right table to join
         """
         rows_a = iter(groupby(rows, key=self._comparator))
-        rows_b = iter(groupby(args[0], key=self._comparator))
+        rows_b: tp.Iterator[tuple[tp.Any, TRowsIterable]] = iter(groupby(args[0], key=self._comparator))
+        if not self.prefetch:
+            yield from self._merge(rows_a, rows_b)
+            return
 
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            yield from self._merge(rows_a, BufferedGroups(rows_b, executor))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _merge(self, rows_a: tp.Iterator[tuple[tp.Any, TRowsIterable]],
+               rows_b: tp.Iterator[tuple[tp.Any, TRowsIterable]]) -> TRowsGenerator:
+        """
+        :param rows_a: groups of left table
+        :param rows_b: groups of right table
+        """
         ak, ag = self._next_iter(rows_a)
         bk, bg = self._next_iter(rows_b)
 
         while ag is not None and bg is not None:
-            assert ak is not None and bk is not None
-
             if ak < bk:
-                yield from self.joiner(self.keys, ag, [])
+                yield from self.joiner(self.keys, ag, ())
                 ak, ag = self._next_iter(rows_a)
                 continue
 
             if bk < ak:
-                yield from self.joiner(self.keys, [], bg)
+                yield from self.joiner(self.keys, [], self._materialize(bg))
                 bk, bg = self._next_iter(rows_b)
                 continue
 
-            yield from self.joiner(self.keys, ag, bg)
+            yield from self.joiner(self.keys, ag, self._materialize(bg))
             ak, ag = self._next_iter(rows_a)
             bk, bg = self._next_iter(rows_b)
 
         while ag is not None:
-            yield from self.joiner(self.keys, ag, [])
+            yield from self.joiner(self.keys, ag, ())
             ak, ag = self._next_iter(rows_a)
 
         while bg is not None:
-            yield from self.joiner(self.keys, [], bg)
+            yield from self.joiner(self.keys, [], self._materialize(bg))
             bk, bg = self._next_iter(rows_b)
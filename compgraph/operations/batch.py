@@ -0,0 +1,67 @@
+import typing as tp
+from dataclasses import dataclass
+
+
+__all__ = [
+    'RowBatch',
+    'iter_batches',
+    'BATCH_SIZE'
+]
+
+
+BATCH_SIZE = 4096
+
+
+@dataclass
+class RowBatch:
+    """
+    Column oriented chunk of rows sharing one schema
+    Example for rows {'a': 1, 'b': 2} and {'a': 3, 'b': 4}
+        RowBatch(cols={'a': [1, 3], 'b': [2, 4]}, n=2)
+    """
+    cols: dict[str, list[tp.Any]]
+    n: int
+
+    @property
+    def schema(self) -> tuple[str, ...]:
+        """Names of columns in order of appearance in rows"""
+        return tuple(self.cols)
+
+    @classmethod
+    def from_rows(cls, rows: list[dict[str, tp.Any]]) -> 'RowBatch':
+        """
+        Transpose rows to columns, schema is taken from the first row
+        :param rows: rows with equal sets of keys
+        """
+        schema = tuple(rows[0]) if rows else ()
+        return cls({k: [row[k] for row in rows] for k in schema}, len(rows))
+
+    def to_rows(self) -> list[dict[str, tp.Any]]:
+        """Transpose columns back to rows"""
+        if not self.cols:
+            return [{} for _ in range(self.n)]
+        schema = self.schema
+        return [dict(zip(schema, values)) for values in zip(*self.cols.values())]
+
+
+def iter_batches(rows: tp.Iterable[dict[str, tp.Any]], size: int = BATCH_SIZE) -> tp.Iterator[RowBatch]:
+    """
+    Split rows stream on batches of at most size rows, new batch is started whenever schema
+    (columns with their order) changes
+    :param rows: table rows
+    :param size: max number of rows in batch
+    """
+    chunk: list[dict[str, tp.Any]] = []
+    schema: tp.Optional[tuple[str, ...]] = None
+    for row in rows:
+        # Keys are compared in order, so rows are rebuilt by to_rows with their own order of columns
+        row_schema = tuple(row)
+        if schema is None:
+            schema = row_schema
+        elif len(chunk) == size or row_schema != schema:
+            yield RowBatch.from_rows(chunk)
+            chunk = []
+            schema = row_schema
+        chunk.append(row)
+    if chunk:
+        yield RowBatch.from_rows(chunk)
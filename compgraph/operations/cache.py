@@ -0,0 +1,87 @@
+import typing as tp
+import pickle
+import tempfile
+import threading
+
+from .base import Operation, TRow, TRowsIterable, TRowsGenerator
+
+
+__all__ = [
+    'Cache',
+    'SpillList'
+]
+
+
+class SpillList:
+    """Append-only storage of rows, which moves rows to temporary file in chunks after memory limit"""
+
+    def __init__(self, max_rows_in_memory: int, chunk_size: int = 1024) -> None:
+        """
+        :param max_rows_in_memory: number of rows kept in memory before spilling
+        :param chunk_size: number of rows pickled into file at once
+        """
+        self.max_rows_in_memory = max_rows_in_memory
+        self.chunk_size = chunk_size
+        self._rows: list[TRow] = []
+        self._chunk: list[TRow] = []
+        self._file: tp.Optional[tp.BinaryIO] = None
+        self._bounds: list[tuple[int, int]] = []
+        self._file_lock = threading.Lock()
+
+    def append(self, row: TRow) -> None:
+        if len(self._rows) < self.max_rows_in_memory:
+            self._rows.append(row)
+            return
+        self._chunk.append(row)
+        if len(self._chunk) == self.chunk_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self._file is None:
+            self._file = tp.cast(tp.BinaryIO, tempfile.TemporaryFile())
+        self._file.seek(0, 2)
+        start = self._file.tell()
+        pickle.dump(self._chunk, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._bounds.append((start, self._file.tell()))
+        self._chunk = []
+
+    def __iter__(self) -> TRowsGenerator:
+        """Every iterator yields own copies of rows, so consumers can not affect each other
+        Iterators may be driven from several threads, appending must be finished before iterating
+        """
+        for row in self._rows:
+            yield row.copy()
+        for start, end in self._bounds:
+            assert self._file is not None
+            # File position is shared by all iterators, so seek and read of one chunk are done under lock
+            with self._file_lock:
+                self._file.seek(start)
+                data = self._file.read(end - start)
+            yield from pickle.loads(data)
+        for row in self._chunk:
+            yield row.copy()
+
+
+class Cache(Operation):
+    """Materialize rows once to replay them to several consumers"""
+
+    def __init__(self, max_rows_in_memory: int = 100000) -> None:
+        """
+        :param max_rows_in_memory: number of rows kept in memory, the rest is spilled to temporary file
+        """
+        self.max_rows_in_memory = max_rows_in_memory
+
+    def materialize(self, rows: TRowsIterable) -> SpillList:
+        """
+        :param rows: table rows to store
+        """
+        storage = SpillList(self.max_rows_in_memory)
+        for row in rows:
+            storage.append(row)
+        return storage
+
+    def __call__(self, rows: TRowsIterable, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
+        """
+        :param rows: storage returned by materialize
+        """
+        yield from rows
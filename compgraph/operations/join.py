@@ -1,6 +1,8 @@
 import typing as tp
 
-from .base import TRowsIterable, TRowsGenerator, Joiner
+from itertools import chain
+
+from .base import TRow, TRowsIterable, TRowsGenerator, Joiner
 
 
 __all__ = [
@@ -14,15 +16,15 @@ __all__ = [
 class InnerJoiner(Joiner):
     """Join with inner strategy"""
 
-    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
-        yield from self.prod_tables(keys, rows_a, list(rows_b))
+    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: tp.Sequence[TRow]) -> TRowsGenerator:
+        yield from self.prod_tables(keys, rows_a, rows_b)
 
 
 class OuterJoiner(Joiner):
     """Join with outer strategy"""
 
-    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
-        rows_a, rows_b = list(rows_a), list(rows_b)
+    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: tp.Sequence[TRow]) -> TRowsGenerator:
+        rows_a = list(rows_a)
 
         yield from self.prod_tables(keys, rows_a, rows_b)
 
@@ -36,22 +38,21 @@ class OuterJoiner(Joiner):
 class LeftJoiner(Joiner):
     """Join with left strategy"""
 
-    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
-        rows_b = list(rows_b)
-
-        yield from self.prod_tables(keys, rows_a, rows_b)
-
+    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: tp.Sequence[TRow]) -> TRowsGenerator:
         if not rows_b:
             yield from rows_a
+            return
+
+        yield from self.prod_tables(keys, rows_a, rows_b)
 
 
 class RightJoiner(Joiner):
     """Join with right strategy"""
 
-    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: TRowsIterable) -> TRowsGenerator:
-        rows_b = list(rows_b)
-
-        yield from self.prod_tables(keys, rows_a, rows_b)
+    def __call__(self, keys: tp.Sequence[str], rows_a: TRowsIterable, rows_b: tp.Sequence[TRow]) -> TRowsGenerator:
+        rows_a = iter(rows_a)
+        for first in rows_a:
+            yield from self.prod_tables(keys, chain((first,), rows_a), rows_b)
+            return
 
-        if not rows_a:
-            yield from rows_b
+        yield from rows_b
@@ -2,9 +2,10 @@ import typing as tp
 import re
 import string
 import datetime
-from math import radians, cos, sin, asin, sqrt
+from math import pi, cos, sin, asin, sqrt
 
-from .base import TRowsGenerator, TRow, Mapper
+from .base import TRowsGenerator, TRow, Mapper, SingleOutMapper, BatchMapper
+from .batch import RowBatch
 
 
 __all__ = [
@@ -12,24 +13,36 @@ __all__ = [
     "FilterPunctuation",
     "LowerCase",
     "Split",
+    "TextNormalize",
     "Product",
     "Filter",
     "Project",
     "Apply",
     'StringToDateTime',
+    'DurationHourWeekday',
     'HaversineDist',
     'Remove'
 ]
 
 
-class DummyMapper(Mapper):
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+_DATETIME_FMT_US = '%Y%m%dT%H%M%S.%f'
+_DATETIME_FMT_S = '%Y%m%dT%H%M%S'
+# Weekday abbreviations indexed by datetime.weekday(), fixed to English unlike locale dependent strftime('%a')
+_WEEKDAY_ABBR = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+class DummyMapper(SingleOutMapper):
     """Yield exactly the row passed"""
 
+    def transform(self, row: TRow) -> TRow:
+        return row
+
     def __call__(self, row: TRow) -> TRowsGenerator:
         yield row
 
 
-class FilterPunctuation(Mapper):
+class FilterPunctuation(SingleOutMapper):
     """Left only non-punctuation symbols"""
 
     def __init__(self, column: str):
@@ -38,13 +51,15 @@ class FilterPunctuation(Mapper):
         """
         self.column = column
 
+    def transform(self, row: TRow) -> TRow:
+        row[self.column] = row[self.column].translate(_PUNCT_TABLE)
+        return row
+
     def __call__(self, row: TRow) -> TRowsGenerator:
-        regex = re.compile('[%s]' % re.escape(string.punctuation))
-        row[self.column] = regex.sub('', row[self.column])
-        yield row
+        yield self.transform(row)
 
 
-class LowerCase(Mapper):
+class LowerCase(SingleOutMapper):
     """Replace column value with value in lower case"""
 
     def __init__(self, column: str):
@@ -53,13 +68,12 @@ class LowerCase(Mapper):
         """
         self.column = column
 
-    @staticmethod
-    def _lower_case(txt: str) -> str:
-        return txt.lower()
+    def transform(self, row: TRow) -> TRow:
+        row[self.column] = row[self.column].lower()
+        return row
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        row[self.column] = self._lower_case(row[self.column])
-        yield row
+        yield self.transform(row)
 
 
 class Split(Mapper):
@@ -68,26 +82,51 @@ class Split(Mapper):
     def __init__(self, column: str, separator: str | None = None) -> None:
         """
         :param column: name of column to split
-        :param separator: string to separate by
+        :param separator: regex to separate by, any whitespace sequence if None
         """
         self.column = column
-        self.separator = re.compile(separator) if separator is not None else re.compile(r'[\s+]')
+        self.separator = re.compile(separator) if separator is not None else None
 
     def __call__(self, row: TRow) -> TRowsGenerator:
-        text: str = row[self.column]
+        # Every result is a copy of source row with only split column replaced
+        column = self.column
+        text: str = row[column]
+        if self.separator is None:
+            for word in text.split():
+                result_row = row.copy()
+                result_row[column] = word
+                yield result_row
+            return
         prev: int = 0
-        row = row.copy()
-        for cur in re.finditer(self.separator, text):
-            row[self.column] = text[prev:cur.start()]
-            yield row
+        for cur in self.separator.finditer(text):
+            result_row = row.copy()
+            result_row[column] = text[prev:cur.start()]
+            yield result_row
             prev = cur.end()
-            row = row.copy()
         if len(text) != prev:
-            row[self.column] = text[prev:]
-            yield row
+            result_row = row.copy()
+            result_row[column] = text[prev:]
+            yield result_row
 
 
-class Product(Mapper):
+class TextNormalize(Mapper):
+    """Remove punctuation, lower case and split by whitespaces in one pass"""
+
+    def __init__(self, column: str) -> None:
+        """
+        :param column: name of column to process
+        """
+        self.column = column
+
+    def __call__(self, row: TRow) -> TRowsGenerator:
+        column = self.column
+        for word in row[column].translate(_PUNCT_TABLE).lower().split():
+            result_row = row.copy()
+            result_row[column] = word
+            yield result_row
+
+
+class Product(BatchMapper):
     """Calculates product of multiple columns"""
 
     def __init__(self, columns: tp.Sequence[str], result_column: str = 'product') -> None:
@@ -98,13 +137,22 @@ class Product(Mapper):
         self.columns = columns
         self.result_column = result_column
 
-    def __call__(self, row: TRow) -> TRowsGenerator:
-        row = row.copy()
+    def transform(self, row: TRow) -> TRow:
         prod_val = 1
         for col in self.columns:
             prod_val *= row[col]
         row[self.result_column] = prod_val
-        yield row
+        return row
+
+    def call_batch(self, batch: RowBatch) -> RowBatch:
+        prod_vals: list[tp.Any] = [1] * batch.n
+        for col in self.columns:
+            prod_vals = [prod_val * val for prod_val, val in zip(prod_vals, batch.cols[col])]
+        batch.cols[self.result_column] = prod_vals
+        return batch
+
+    def __call__(self, row: TRow) -> TRowsGenerator:
+        yield self.transform(row.copy())
 
 
 class Filter(Mapper):
@@ -121,7 +169,7 @@ class Filter(Mapper):
             yield row
 
 
-class Project(Mapper):
+class Project(BatchMapper):
     """Leave only mentioned columns"""
 
     def __init__(self, columns: tp.Sequence[str]) -> None:
@@ -130,11 +178,18 @@ class Project(Mapper):
         """
         self.columns = columns
 
+    def transform(self, row: TRow) -> TRow:
+        return {k: row[k] for k in self.columns}
+
+    def call_batch(self, batch: RowBatch) -> RowBatch:
+        batch.cols = {k: batch.cols[k] for k in self.columns}
+        return batch
+
     def __call__(self, row: TRow) -> TRowsGenerator:
-        yield {k: row[k] for k in self.columns}
+        yield self.transform(row)
 
 
-class Apply(Mapper):
+class Apply(BatchMapper):
     """Apply given function"""
 
     def __init__(self, columns: tp.Sequence[str], result_column: str, func: tp.Callable[..., tp.Any]):
@@ -147,14 +202,23 @@ class Apply(Mapper):
         self.result_column = result_column
         self.func = func
 
+    def transform(self, row: TRow) -> TRow:
+        row[self.result_column] = self.func(*[row[column] for column in self.columns])
+        return row
+
+    def call_batch(self, batch: RowBatch) -> RowBatch:
+        if self.columns:
+            values = list(map(self.func, *[batch.cols[column] for column in self.columns]))
+        else:
+            values = [self.func() for _ in range(batch.n)]
+        batch.cols[self.result_column] = values
+        return batch
+
     def __call__(self, row: TRow) -> TRowsGenerator:
-        args = [row[column] for column in self.columns]
-        result_row = row.copy()
-        result_row[self.result_column] = self.func(*args)
-        yield result_row
+        yield self.transform(row.copy())
 
 
-class StringToDateTime(Mapper):
+class StringToDateTime(SingleOutMapper):
     """Convert UTC time string to datetime"""
 
     def __init__(self, columns: list[str]) -> None:
@@ -165,21 +229,74 @@ class StringToDateTime(Mapper):
 
     @staticmethod
     def _make_datetime(s: str) -> datetime.datetime:
+        """
+        Parse string of format YYYYmmddTHHMMSS with optional .ffffff by slicing,
+        strptime is used only for strings of unexpected shape
+        """
+        # int accepts signs, spaces and underscores, so digits are checked to reject what strptime rejects
+        if (len(s) == 15 or (17 <= len(s) <= 22 and s[15] == '.')) and s[8] == 'T' \
+                and (s[:8] + s[9:15] + s[16:]).isdigit():
+            try:
+                return datetime.datetime(
+                    int(s[0:4]), int(s[4:6]), int(s[6:8]), int(s[9:11]), int(s[11:13]), int(s[13:15]),
+                    int(s[16:].ljust(6, '0')) if len(s) > 15 else 0
+                )
+            except ValueError:
+                pass
         try:
-            return datetime.datetime.strptime(s, '%Y%m%dT%H%M%S.%f')
+            return datetime.datetime.strptime(s, _DATETIME_FMT_US)
         except ValueError:
-            return datetime.datetime.strptime(s, '%Y%m%dT%H%M%S')
+            return datetime.datetime.strptime(s, _DATETIME_FMT_S)
 
-    def __call__(self, row: TRow) -> TRowsGenerator:
-        row = row.copy()
+    def transform(self, row: TRow) -> TRow:
         for column in self.columns:
             row[column] = self._make_datetime(row[column])
-        yield row
+        return row
+
+    def __call__(self, row: TRow) -> TRowsGenerator:
+        yield self.transform(row.copy())
+
 
+class DurationHourWeekday(SingleOutMapper):
+    """
+    Replace enter and leave UTC time strings with duration in hours, hour and weekday of enter
+    Example for enter_column='e', leave_column='l'
+        {'id': 1, 'e': '20171020T112238.723000', 'l': '20171020T112337.723000'}
+        =>
+        {'id': 1, 'duration': 0.01638..., 'hour': 11, 'weekday': 'Fri'}
+    """
 
-class HaversineDist(Mapper):
+    def __init__(self, enter_column: str, leave_column: str, duration_column: str = 'duration',
+                 hour_column: str = 'hour', weekday_column: str = 'weekday') -> None:
+        """
+        :param enter_column: column with enter time string
+        :param leave_column: column with leave time string
+        :param duration_column: column to write duration in hours
+        :param hour_column: column to write hour of enter
+        :param weekday_column: column to write abbreviated weekday of enter
+        """
+        self.enter_column = enter_column
+        self.leave_column = leave_column
+        self.duration_column = duration_column
+        self.hour_column = hour_column
+        self.weekday_column = weekday_column
+
+    def transform(self, row: TRow) -> TRow:
+        enter = StringToDateTime._make_datetime(row.pop(self.enter_column))
+        leave = StringToDateTime._make_datetime(row.pop(self.leave_column))
+        row[self.duration_column] = (leave - enter).total_seconds() / 3600
+        row[self.hour_column] = enter.hour
+        row[self.weekday_column] = _WEEKDAY_ABBR[enter.weekday()]
+        return row
+
+    def __call__(self, row: TRow) -> TRowsGenerator:
+        yield self.transform(row.copy())
+
+
+class HaversineDist(SingleOutMapper):
     """Calculate haversine dist between two points"""
     EARTH_RADIUS_KM = 6373
+    DEG_TO_RAD = pi / 180
 
     def __init__(self, start_column: str, end_column: str, column: str):
         """
@@ -191,26 +308,32 @@ class HaversineDist(Mapper):
         self.end = end_column
         self.column = column
 
+    def transform(self, row: TRow) -> TRow:
+        lng1, lat1 = row[self.start]
+        lng2, lat2 = row[self.end]
+        row[self.column] = self._haversine_dist(lng1, lat1, lng2, lat2)
+        return row
+
     def __call__(self, row: TRow) -> TRowsGenerator:
-        row = row.copy()
-        row[self.column] = self._haversine_dist(*row[self.start], *row[self.end])
-        yield row
+        yield self.transform(row.copy())
 
     @classmethod
     def _haversine_dist(cls, lng1: float, lat1: float, lng2: float, lat2: float) -> float:
         """
         Calculate haversine distance between (lat1, lng1) and (lat2, lng2)
+        Degrees are converted by single multiplication instead of per-argument radians calls
         """
+        to_rad = cls.DEG_TO_RAD
+        lat1 *= to_rad
+        lat2 *= to_rad
+        sin_lat = sin((lat2 - lat1) * 0.5)
+        sin_lng = sin((lng2 - lng1) * to_rad * 0.5)
 
-        lat1, lng1, lat2, lng2 = map(radians, (lat1, lng1, lat2, lng2))
-        lat = lat2 - lat1
-        lng = lng2 - lng1
-
-        d = sin(lat * 0.5) ** 2 + cos(lat1) * cos(lat2) * sin(lng * 0.5) ** 2
+        d = sin_lat * sin_lat + cos(lat1) * cos(lat2) * sin_lng * sin_lng
         return 2 * cls.EARTH_RADIUS_KM * asin(sqrt(d))
 
 
-class Remove(Mapper):
+class Remove(BatchMapper):
     """Leave only not mentioned columns"""
 
     def __init__(self, columns: tp.Sequence[str]) -> None:
@@ -219,5 +342,15 @@ class Remove(Mapper):
         """
         self.columns = columns
 
+    def transform(self, row: TRow) -> TRow:
+        for k in self.columns:
+            row.pop(k, None)
+        return row
+
+    def call_batch(self, batch: RowBatch) -> RowBatch:
+        for k in self.columns:
+            batch.cols.pop(k, None)
+        return batch
+
     def __call__(self, row: TRow) -> TRowsGenerator:
         yield {k: row[k] for k in row if k not in self.columns}
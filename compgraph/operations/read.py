@@ -1,4 +1,5 @@
 import typing as tp
+import mmap
 
 from .base import Operation, TRow, TRowsGenerator
 
@@ -12,19 +13,44 @@ __all__ = [
 class Read(Operation):
     """Generator of parsed rows from file"""
 
-    def __init__(self, filename: str, parser: tp.Callable[[str], TRow]) -> None:
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self, filename: str, parser: tp.Callable[[tp.Any], TRow], use_mmap: bool = False) -> None:
         """
         :param filename: File to read from
-        :param parser: Parser used to make TRow from string
+        :param parser: Parser used to make TRow from string (from bytes if use_mmap is set)
+        :param use_mmap: Read memory mapped file instead of decoded text lines
         """
         self.filename = filename
         self.parser = parser
+        self.use_mmap = use_mmap
+
+    @classmethod
+    def from_mmap(cls, filename: str, parser: tp.Callable[[bytes], TRow]) -> 'Read':
+        """
+        Read memory mapped file, lines are passed to parser as bytes without decoding
+        (e.g. json.loads accepts them directly)
+        :param filename: File to read from
+        :param parser: Parser used to make TRow from bytes
+        """
+        return cls(filename, parser, use_mmap=True)
 
     def __call__(self, *args: tp.Any, **kwargs: tp.Any) -> TRowsGenerator:
-        with open(self.filename) as f:
+        if self.use_mmap:
+            yield from self._read_mmap()
+            return
+        with open(self.filename, buffering=self.BUFFER_SIZE, encoding='utf-8') as f:
             for line in f:
                 yield self.parser(line)
 
+    def _read_mmap(self) -> TRowsGenerator:
+        with open(self.filename, 'rb') as f:
+            if not f.seek(0, 2):
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for line in iter(mm.readline, b''):
+                    yield self.parser(line)
+
 
 class ReadIterFactory(Operation):
     """Generator of rows from key-word argument"""
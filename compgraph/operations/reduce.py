@@ -1,8 +1,12 @@
 import typing as tp
 import heapq
-from collections import defaultdict
+from abc import abstractmethod
+from collections import Counter
+from itertools import chain
+from math import fsum
+from operator import itemgetter
 
-from .base import TRow, TRowsIterable, TRowsGenerator, Reducer
+from .base import TRow, TRowsIterable, TRowsGenerator, Reducer, key_row_maker
 
 
 __all__ = [
@@ -20,15 +24,19 @@ __all__ = [
 class FirstReducer(Reducer):
     """Yield only first row from passed ones"""
 
+    __slots__ = ()
+
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        for row in rows:
-            yield row
-            break
+        first = next(iter(rows), None)
+        if first is not None:
+            yield first
 
 
 class TopN(Reducer):
     """Calculate top N by value"""
 
+    __slots__ = ('column_max', 'n')
+
     def __init__(self, column: str, n: int) -> None:
         """
         :param column: column name to get top by
@@ -38,23 +46,15 @@ class TopN(Reducer):
         self.n = n
 
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        sorted_lst: list[tuple[tp.Any, ...]] = []
-        i: int = 0
-        for row in rows:
-            el: tuple[tp.Any, ...] = (row[self.column_max], -i, row)
-            if len(sorted_lst) < self.n:
-                heapq.heappush(sorted_lst, el)
-            elif row[self.column_max] > sorted_lst[0][0]:
-                heapq.heappop(sorted_lst)
-                heapq.heappush(sorted_lst, el)
-            i += 1
-        for a, b, row in sorted_lst:
-            yield row
+        """Rows are yielded in descending order, the first seen row wins among equal values"""
+        yield from heapq.nlargest(self.n, rows, key=itemgetter(self.column_max))
 
 
 class TermFrequency(Reducer):
     """Calculate frequency of values in column"""
 
+    __slots__ = ('words_column', 'result_column')
+
     def __init__(self, words_column: str, result_column: str = 'tf') -> None:
         """
         :param words_column: name for column with words
@@ -64,22 +64,55 @@ class TermFrequency(Reducer):
         self.result_column = result_column
 
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        counts: defaultdict[tp.Any, int] = defaultdict(int)
-        counter: int = 0
-        return_row: TRow = {}
-        for row in rows:
-            if not return_row:
-                return_row = {k: row[k] for k in group_key}
-            counts[row[self.words_column]] += 1
-            counter += 1
-        for k, v in counts.items():
-            cur_row = return_row.copy()
-            cur_row[self.words_column] = k
-            cur_row[self.result_column] = v / counter
-            yield cur_row
-
-
-class Count(Reducer):
+        words_column = self.words_column
+        result_column = self.result_column
+        rows = iter(rows)
+        for first in rows:
+            return_row: TRow = {k: first[k] for k in group_key}
+            # Counter counts words fed by C-level getter without Python loop
+            counts: Counter[tp.Any] = Counter(map(itemgetter(words_column), chain((first,), rows)))
+            counter: int = counts.total()
+            for k, v in counts.items():
+                cur_row = return_row.copy()
+                cur_row[words_column] = k
+                cur_row[result_column] = v / counter
+                yield cur_row
+
+
+class _Aggregate(Reducer):
+    """
+    Base class for reducers which yield one row per group with key columns and aggregated values
+    Aggregation is implemented once in `_aggregate` and used both for single group and all groups
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def _aggregate(self, result_row: TRow, rows: TRowsIterable) -> TRow:
+        """
+        :param result_row: row with key columns to write aggregated values to
+        :param rows: non-empty group rows
+        """
+        pass
+
+    def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
+        rows = iter(rows)
+        for first in rows:
+            yield self._aggregate({k: first[k] for k in group_key}, chain((first,), rows))
+
+    def reduce_groups(self, group_key: tuple[str, ...],
+                      groups: tp.Iterable[tuple[tp.Any, TRowsIterable]]) -> TRowsGenerator:
+        # Subclass overriding __call__ is called per group, so its logic is not bypassed
+        if type(self).__call__ is not _Aggregate.__call__:
+            yield from super().reduce_groups(group_key, groups)
+            return
+        make_row = key_row_maker(group_key)
+        aggregate = self._aggregate
+        for key, rows in groups:
+            yield aggregate(make_row(key), rows)
+
+
+class Count(_Aggregate):
     """
     Count records by key
     Example for group_key=('a',) and column='d'
@@ -89,26 +122,24 @@ class Count(Reducer):
         {'a': 1, 'd': 2}
     """
 
+    __slots__ = ('column',)
+
     def __init__(self, column: str) -> None:
         """
         :param column: name for result column
         """
         self.column = column
 
-    def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        result_row: TRow = {}
-        for row in rows:
-            if not result_row:
-                result_row = {k: row[k] for k in group_key if k in row}
-                result_row[self.column] = 1
-            else:
-                result_row[self.column] += 1
-        yield result_row
+    def _aggregate(self, result_row: TRow, rows: TRowsIterable) -> TRow:
+        result_row[self.column] = sum(1 for _ in rows)
+        return result_row
 
 
 class Index(Reducer):
     """Make indexation column in table"""
 
+    __slots__ = ('column',)
+
     def __init__(self, column: str) -> None:
         """
         :param column: name for result column
@@ -116,15 +147,14 @@ class Index(Reducer):
         self.column = column
 
     def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        index: int = 0
-        for row in rows:
+        column = self.column
+        for index, row in enumerate(rows):
             result_row: TRow = row.copy()
-            result_row[self.column] = index
-            index += 1
+            result_row[column] = index
             yield result_row
 
 
-class Sum(Reducer):
+class Sum(_Aggregate):
     """
     Sum values aggregated by key
     Example for key=('a',) and column='b'
@@ -134,26 +164,29 @@ class Sum(Reducer):
         {'a': 1, 'b': 5}
     """
 
+    __slots__ = ('column',)
+
     def __init__(self, column: str) -> None:
         """
         :param column: name for sum column
         """
         self.column = column
 
-    def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        result_row: TRow = {}
-        for row in rows:
-            if not result_row:
-                result_row = {k: row[k] for k in group_key}
-                result_row[self.column] = row[self.column]
-            else:
-                result_row[self.column] += row[self.column]
-        yield result_row
+    def _aggregate(self, result_row: TRow, rows: TRowsIterable) -> TRow:
+        # Values are summed by builtin sum over C-level getter, starting from the first one
+        values = map(itemgetter(self.column), rows)
+        first = next(values)
+        if isinstance(first, str):
+            # sum refuses strings, join concatenates them as `+` does
+            result_row[self.column] = first + ''.join(values)
+        else:
+            result_row[self.column] = sum(values, first)
+        return result_row
 
 
-class Mean(Reducer):
+class Mean(_Aggregate):
     """
-    Mean value aggregated by key
+    Mean value aggregated by key, values are summed without accumulating rounding errors
     Example for key=('a',) and column='b'
         {'a': 1, 'b': 2, 'c': 4}
         {'a': 1, 'b': 3, 'c': 5}
@@ -161,36 +194,32 @@ class Mean(Reducer):
         {'a': 1, 'b': 2.5}
     """
 
+    __slots__ = ('column',)
+
     def __init__(self, column: str) -> None:
         """
         :param column: name for mean column
         """
         self.column = column
 
-    def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        result_row: TRow = {}
-        n: int = 0
-        for row in rows:
-            n += 1
-            if not result_row:
-                result_row = {k: row[k] for k in group_key}
-                result_row[self.column] = row[self.column]
-            else:
-                result_row[self.column] += row[self.column]
-        result_row[self.column] /= n
-        yield result_row
+    def _aggregate(self, result_row: TRow, rows: TRowsIterable) -> TRow:
+        values = list(map(itemgetter(self.column), rows))
+        result_row[self.column] = fsum(values) / len(values)
+        return result_row
 
 
-class MeanSpeed(Reducer):
+class MeanSpeed(_Aggregate):
     """
-    Mean speed aggregated by key
+    Mean speed aggregated by key, distances and times are summed without accumulating rounding errors
     Example for key=('a',) and dist_column='d', time_column='t', result_column='ms'
         {'a': 1, 'd': 10, 't': 6}
         {'a': 1, 'd': 15, 't': 4}
         =>
-        {'a': 1, 'b': 2.5}
+        {'a': 1, 'ms': 2.5}
     """
 
+    __slots__ = ('dist_column', 'time_column', 'result_column')
+
     def __init__(self, dist_column: str, time_column: str, result_column: str) -> None:
         """
         :param dist_column: name for column with distances
@@ -201,14 +230,18 @@ class MeanSpeed(Reducer):
         self.time_column = time_column
         self.result_column = result_column
 
-    def __call__(self, group_key: tuple[str, ...], rows: TRowsIterable) -> TRowsGenerator:
-        result_row: TRow = {}
-        sum_dists: float = 0.
-        sum_times: float = 0.
+    def _aggregate(self, result_row: TRow, rows: TRowsIterable) -> TRow:
+        """Zero total time gives zero speed instead of raising"""
+        # Only two value columns are kept from the group, so large groups do not hold their rows
+        dist_column = self.dist_column
+        time_column = self.time_column
+        dists: list[tp.Any] = []
+        times: list[tp.Any] = []
+        add_dist = dists.append
+        add_time = times.append
         for row in rows:
-            if not result_row:
-                result_row = {k: row[k] for k in group_key}
-            sum_dists += row[self.dist_column]
-            sum_times += row[self.time_column]
-        result_row[self.result_column] = sum_dists / sum_times
-        yield result_row
+            add_dist(row[dist_column])
+            add_time(row[time_column])
+        sum_times = fsum(times)
+        result_row[self.result_column] = fsum(dists) / sum_times if sum_times else 0.0
+        return result_row
@@ -0,0 +1,15 @@
+"""JSON functions shared by example scripts: orjson when installed, standard json otherwise"""
+try:
+    from orjson import loads, dumps
+except ImportError:
+    from json import loads, dumps as _dumps
+
+    def dumps(obj: object) -> bytes:  # type: ignore[misc]
+        """Compact UTF-8 encoded JSON, differs from orjson output only in float formatting (e.g. 1e-05, NaN)"""
+        return _dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+__all__ = [
+    'loads',
+    'dumps'
+]
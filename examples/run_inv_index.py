@@ -1,12 +1,9 @@
 import click
-from json import loads, dumps
 
 from compgraph.algorithms import inverted_index_graph
-from compgraph.operations import TRow, Read
+from compgraph.operations import Read
 
-
-def to_trow(row: str) -> TRow:
-    return loads(row)
+from json_lines import loads, dumps
 
 
 @click.command()
@@ -15,10 +12,9 @@ def to_trow(row: str) -> TRow:
 def cli(input_filepath: str, output_filepath: str) -> None:
     graph = inverted_index_graph(input_stream_name='input')
 
-    with open(output_filepath, 'w') as out:
-        kwargs = {'input': Read(input_filepath, to_trow)}
-        for row in graph.run(**kwargs):
-            print(dumps(row), file=out)
+    with open(output_filepath, 'wb', buffering=1 << 20) as out:
+        kwargs = {'input': Read(input_filepath, loads)}
+        out.writelines(dumps(row) + b'\n' for row in graph.run(**kwargs))
 
 
 if __name__ == '__main__':
@@ -1,12 +1,9 @@
 import click
-from json import loads, dumps
 
 from compgraph.algorithms import yandex_maps_graph
-from compgraph.operations import TRow, Read
+from compgraph.operations import Read
 
-
-def to_trow(row: str) -> TRow:
-    return loads(row)
+from json_lines import loads, dumps
 
 
 @click.command()
@@ -16,10 +13,12 @@ def to_trow(row: str) -> TRow:
 def cli(input_filepath_len: str, input_filepath_time: str, output_filepath: str) -> None:
     graph = yandex_maps_graph(input_stream_name_time='time', input_stream_name_length='length')
 
-    with open(output_filepath, 'w') as out:
-        kwargs = {'length': Read(input_filepath_len, to_trow), 'time': Read(input_filepath_time, to_trow)}
-        for row in graph.run(**kwargs):
-            print(dumps(row), file=out)
+    with open(output_filepath, 'wb', buffering=1 << 20) as out:
+        kwargs = {
+            'length': Read(input_filepath_len, loads),
+            'time': Read(input_filepath_time, loads)
+        }
+        out.writelines(dumps(row) + b'\n' for row in graph.run(**kwargs))
 
 
 if __name__ == '__main__':
@@ -1,24 +1,42 @@
 import click
-from json import loads, dumps
 
 from compgraph.algorithms import word_count_graph
-from compgraph.operations import TRow, Read
+from compgraph.operations import Read
 
+from json_lines import loads, dumps
 
-def to_trow(row: str) -> TRow:
-    return loads(row)
+
+def run_polars(input_filepath: str, output_filepath: str, text_column: str = 'text',
+               count_column: str = 'count') -> None:
+    """Columnar equivalent of word_count_graph, requires installed polars"""
+    import polars as pl
+
+    pl.scan_ndjson(input_filepath) \
+        .select(pl.col(text_column).str.replace_all(r'[[:punct:]]', '').str.to_lowercase().str.extract_all(r'\S+')) \
+        .explode(text_column) \
+        .drop_nulls() \
+        .group_by(text_column) \
+        .agg(pl.len().alias(count_column)) \
+        .sort([count_column, text_column]) \
+        .collect() \
+        .write_ndjson(output_filepath)
 
 
 @click.command()
 @click.argument('input_filepath')
 @click.argument('output_filepath')
-def cli(input_filepath: str, output_filepath: str) -> None:
+@click.option('--engine', type=click.Choice(['python', 'polars']), default='python',
+              help='python runs compgraph, polars runs columnar equivalent for large corpora')
+def cli(input_filepath: str, output_filepath: str, engine: str) -> None:
+    if engine == 'polars':
+        run_polars(input_filepath, output_filepath)
+        return
+
     graph = word_count_graph(input_stream_name='input')
 
-    with open(output_filepath, 'w') as out:
-        kwargs = {'input': Read(input_filepath, to_trow)}
-        for row in graph.run(**kwargs):
-            print(dumps(row), file=out)
+    with open(output_filepath, 'wb', buffering=1 << 20) as out:
+        kwargs = {'input': Read(input_filepath, loads)}
+        out.writelines(dumps(row) + b'\n' for row in graph.run(**kwargs))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from compgraph import Graph, operations
+from compgraph.operations import SpillList
+
+
+def test_spill_list_iterated_from_threads() -> None:
+    storage = SpillList(max_rows_in_memory=3, chunk_size=2)
+    for i in range(5000):
+        storage.append({'i': i})
+
+    results: list[list[int]] = [[] for _ in range(8)]
+
+    def read(index: int) -> None:
+        results[index] = [row['i'] for row in storage]
+
+    threads = [threading.Thread(target=read, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result == list(range(5000)) for result in results)
+
+
+def _spilled_cache_graph() -> Graph:
+    # Every join side reads the same spilled cache
+    cached = Graph.graph_from_iter('input').cache(max_rows_in_memory=10)
+    graph = cached.reduce(operations.Sum('value'), ('key',), strategy='hash')
+    for column in ('a', 'b', 'c'):
+        side = cached.reduce(operations.Count(column), ('key',), strategy='hash')
+        graph = graph.join(operations.InnerJoiner(), side, ('key',))
+    return graph
+
+
+def test_run_parallel_with_spilled_cache() -> None:
+    rows = [{'key': i % 50, 'value': i} for i in range(50000)]
+    graph = _spilled_cache_graph()
+
+    expected = list(graph.run(input=lambda: iter(rows)))
+    assert len(expected) == 50
+    for _ in range(3):
+        assert list(graph.run_parallel(input=lambda: iter(rows))) == expected
+
+
+def test_join_prefetch_with_spilled_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    rows = [{'key': i % 50, 'value': i} for i in range(50000)]
+    expected = list(_spilled_cache_graph().run(input=lambda: iter(rows)))
+
+    monkeypatch.setenv('JOIN_PREFETCH', '1')
+    graph = _spilled_cache_graph()
+    for _ in range(3):
+        assert list(graph.run(input=lambda: iter(rows))) == expected
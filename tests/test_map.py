@@ -0,0 +1,126 @@
+import datetime
+import typing as tp
+
+import pytest
+
+from compgraph import Graph, operations
+
+
+class _YieldRowAndCopy(operations.Mapper):
+    """Yield passed row and then its copy with extra column"""
+
+    def __call__(self, row: operations.TRow) -> operations.TRowsGenerator:
+        yield row
+        copy = row.copy()
+        copy['copy'] = True
+        yield copy
+
+
+class _YieldRowTwice(operations.Mapper):
+    """Yield the same row object twice"""
+
+    def __call__(self, row: operations.TRow) -> operations.TRowsGenerator:
+        yield row
+        yield row
+
+
+def _run(graph: Graph, rows: list[operations.TRow]) -> list[operations.TRow]:
+    return list(graph.run(input=lambda: iter([row.copy() for row in rows])))
+
+
+@pytest.mark.parametrize('mapper', [_YieldRowAndCopy(), _YieldRowTwice()])
+def test_fused_map_does_not_modify_yielded_rows(mapper: operations.Mapper) -> None:
+    graph = Graph.graph_from_iter('input') \
+        .map(operations.Apply(('v',), 'v', lambda v: v)) \
+        .map(mapper) \
+        .map(operations.Apply(('v',), 'v', lambda v: v * 10))
+    assert isinstance(graph._op, operations.FusedMap)
+
+    result = _run(graph, [{'v': 1}])
+
+    assert len(result) == 2
+    assert [row['v'] for row in result] == [10, 10]
+
+
+@pytest.mark.parametrize('first, second', [
+    (operations.Project(('a', 'b')), operations.Remove(('b',))),
+    (operations.Project(('a', 'b')), operations.Project(('a',))),
+    (operations.Project(('b',)), operations.Remove(('c',))),
+    (operations.Remove(('c',)), operations.Project(('b',))),
+])
+def test_merged_columns_mappers_raise_for_missing_column(first: operations.Mapper,
+                                                         second: operations.Mapper) -> None:
+    graph = Graph.graph_from_iter('input').map(first).map(second)
+    with pytest.raises(KeyError):
+        _run(graph, [{'a': 1}])
+
+
+@pytest.mark.parametrize('first, second, merged_type', [
+    (operations.Project(('a', 'b')), operations.Project(('b', 'a')), operations.Project),
+    (operations.Project(('a',)), operations.Remove(('c',)), operations.Project),
+    (operations.Remove(('b',)), operations.Remove(('c',)), operations.Remove),
+    (operations.Remove(('b',)), operations.Project(('a',)), operations.Project),
+])
+def test_columns_mappers_merged(first: operations.Mapper, second: operations.Mapper,
+                                merged_type: tp.Type[operations.Mapper]) -> None:
+    rows = [{'a': 1, 'b': 2, 'c': 3}]
+    graph = Graph.graph_from_iter('input').map(first).map(second)
+    assert isinstance(graph._op, operations.Map)
+    assert type(graph._op.mapper) is merged_type
+
+    expected = list(operations.FusedMap([first, second])(row.copy() for row in rows))
+    assert _run(graph, rows) == expected
+
+
+@pytest.mark.parametrize('first, second', [
+    (operations.Project(('a', 'b')), operations.Remove(('b',))),
+    (operations.Project(('a', 'b')), operations.Project(('a',))),
+    (operations.Remove(('b',)), operations.Project(('a', 'b'))),
+])
+def test_columns_mappers_not_merged(first: operations.Mapper, second: operations.Mapper) -> None:
+    graph = Graph.graph_from_iter('input').map(first).map(second)
+    assert isinstance(graph._op, operations.FusedMap)
+
+
+def _strptime(s: str) -> datetime.datetime:
+    try:
+        return datetime.datetime.strptime(s, '%Y%m%dT%H%M%S.%f')
+    except ValueError:
+        return datetime.datetime.strptime(s, '%Y%m%dT%H%M%S')
+
+
+@pytest.mark.parametrize('value', [
+    '20171020T112238',
+    '20171020T112238.7',
+    '20171020T112238.723',
+    '20171020T112238.723000',
+    '20171231T235959.999999',
+    '20171020T1122.8',
+    '20171020T11223.8',
+    '2017102T112238',
+    '20171020T112238.',
+    '20171020T112238.1234567',
+    '20171020 112238',
+    '20171020T11_238',
+    '+0171020T112238',
+    '20171320T112238',
+    '20170230T112238',
+    '20171020T246060',
+])
+def test_string_to_datetime_matches_strptime(value: str) -> None:
+    try:
+        expected: tp.Any = _strptime(value)
+    except ValueError:
+        with pytest.raises(ValueError):
+            list(operations.StringToDateTime(['t'])({'t': value}))
+        return
+    assert list(operations.StringToDateTime(['t'])({'t': value})) == [{'t': expected}]
+
+
+def test_fused_batch_map_keeps_column_order() -> None:
+    rows = [{'a': 1, 'b': 2}, {'b': 3, 'a': 4}]
+    mapper = operations.FusedMap([operations.Apply(('a',), 'c', lambda a: a * 2), operations.Remove(('d',))])
+
+    result = list(mapper(row.copy() for row in rows))
+
+    assert [list(row.items()) for row in result] == [[('a', 1), ('b', 2), ('c', 2)], [('b', 3), ('a', 4), ('c', 8)]]